@@ -104,6 +104,7 @@ _recordtype_info = {
     '05L0': {'name':'GRJES', 'df':'_generalJES'}
     }
 
+# low-cardinality columns are converted to category dtype by IRRDBU00._categorize (see _isCategory in irrdbu00.py).
 for d in offsets:
   print('@property')
   rtype = offsets[d]['record-type']
@@ -115,7 +116,7 @@ for d in offsets:
   descs = []
   for field in offsets[d]['offsets']:
         fields.append(field["field-name"])
-        descs.append(field["field-desc"])
+        descs.append(field["field-desc"].replace('*', '\\*'))
   # let longests
   maxf = maxd = 0
   for field in fields:
@@ -136,4 +137,4 @@ for d in offsets:
   print(f'    """')
 
   print(f'    return self.{df}')
-  print('')
\ No newline at end of file
+  print('')
@@ -1,7 +1,7 @@
 import sys
-sys.path.append("../src/mfpandas")
+sys.path.append("../src")
 
-from irrdbu00 import IRRDBU00
+from mfpandas import IRRDBU00, fast_eq
 
 r = IRRDBU00('../test_irrdbu00_data')
 r.parse_fancycli()
@@ -16,6 +16,9 @@ def b():
 def c():
     return r.groups[r.groups['GPBD_NAME'].to_numpy()=='SYS1']
 
+def d():
+    return fast_eq(r.groups, 'GPBD_NAME', 'SYS1')
+
 import time
 
 def dotime():
@@ -34,5 +37,10 @@ def dotime():
         z = c()
     elaps = time.time() - start
     print('C: with_numpy ', elaps/1000)
+    start = time.time()
+    for i in range(1000):
+        z = d()
+    elaps = time.time() - start
+    print('D: fast_eq    ', elaps/1000)
 
 dotime()
@@ -29,8 +29,14 @@ setuptools.setup(
     include_package_data=True,
     install_requires=[
         'wheel',
-        'pandas>=1.5.2',
+        'numpy',
+        'pandas>=2.0',
         'xlsxwriter>=3.1.0'
     ],
-    python_requires=">=3.6",
+    extras_require={
+        'numba': ['numba'],
+        'pyarrow': ['pyarrow'],
+        'zstd': ['zstandard'],
+    },
+    python_requires=">=3.8",
 )
@@ -3,6 +3,33 @@ class MFPandasException(Exception):
         self.message = message
         super().__init__(self.message)
 
+def fast_eq(df, col, val):
+    """
+    Returns the rows of a DataFrame where a column equals a value.
+
+    For object columns this compares against the NumPy values of the column, which is
+    faster than ``df.loc[df[col]==val]`` (see dev-support/timingtests.py). Other dtypes
+    (category, the pandas 3 ``str`` dtype, numbers) are faster with a plain ``==`` on the
+    Series, so those just use that.
+
+    :param df: The DataFrame to filter
+    :type df: pandas.DataFrame
+    :param col: Name of the column to compare
+    :type col: str
+    :param val: Value to compare with
+
+    Example usage::
+
+        >>> from mfpandas import IRRDBU00, fast_eq
+        >>> r = IRRDBU00(irrdbu00='/path/to/irrdbu00')
+        >>> r.parse_fancycli()
+        >>> fast_eq(r.groups, 'GPBD_NAME', 'SYS1')
+
+    """
+    if df[col].dtype == object:
+        return df[df[col].to_numpy() == val]
+    return df[df[col] == val]
+
 from .dcollect import DCOLLECT 
 from .irrdbu00 import IRRDBU00 
 
@@ -1,9 +1,20 @@
+import importlib.resources
+import json
+import mmap
 import os 
+import pickle
+import struct
+import numpy as np
 import pandas as pd 
 import datetime 
 
-import threading
-import time
+import concurrent.futures
+
+try:
+    import pyarrow as pa
+except ImportError:
+    # pyarrow is optional, only needed for dtype_backend='pyarrow'
+    pa = None
 
 class UsageError(Exception):
     """Raised when a usage error occurs."""
@@ -11,6 +22,295 @@ class UsageError(Exception):
         self.message = message
         super().__init__(self.message)
 
+# Every record starts with its length (DCULENG), a big-endian halfword
+_DCULENG = struct.Struct('>H')
+
+# Every record is at least DCULENG, 2 reserved bytes and DCURCTYP long
+_MIN_DCULENG = 6
+
+# DCURCTYP, the recordtype at offset 4, as EBCDIC halfword
+_RECTYPE_D = int.from_bytes('D '.encode('cp500'), 'big')
+_RECTYPE_V = int.from_bytes('V '.encode('cp500'), 'big')
+
+def _walk_records(buf):
+    """
+    Returns the offsets of all records in ``buf`` (the entire DCOLLECT file as uint8 array) by walking the DCULENG chain.
+    Meant to be compiled with numba (see _jit_walk_records), as plain Python the struct based scan is faster.
+    """
+    count = 0
+    pos = 0
+    while pos + 2 <= buf.shape[0]:
+        DCULENG = (np.int64(buf[pos]) << 8) | np.int64(buf[pos+1])
+        if DCULENG == 0:
+            # nothing sensible left in the file
+            break
+        count += 1
+        if DCULENG < _MIN_DCULENG:
+            # can't even hold the header, stop here and let _scan_records report it
+            break
+        pos += DCULENG
+    starts = np.empty(count, dtype=np.int64)
+    pos = 0
+    for i in range(count):
+        starts[i] = pos
+        pos += (np.int64(buf[pos]) << 8) | np.int64(buf[pos+1])
+    return starts
+
+# Importing numba and loading the compiled scan takes a few tenths of a second, the plain scan
+# does about 2.5 million records per second. So only use numba for big files.
+_NUMBA_MIN_SIZE = 256 * 1024 * 1024
+_walk_records_jit = None
+
+def _jit_walk_records():
+    """Returns _walk_records compiled with numba, or None if numba is not installed."""
+    global _walk_records_jit
+    if _walk_records_jit is None:
+        try:
+            from numba import njit
+        except ImportError:
+            # numba is optional, without it the record scan runs as plain Python
+            _walk_records_jit = False
+        else:
+            _walk_records_jit = njit(cache=True, boundscheck=False)(_walk_records)
+    return _walk_records_jit or None
+
+def _scan_records(data):
+    """
+    Returns the offsets of all records in ``data`` (the entire DCOLLECT file, as bytes or uint8 array).
+    Raises UsageError if a record is too short to hold its header (DCULENG and DCURCTYP),
+    or if the last record runs past the end of the file.
+    """
+    walk = _jit_walk_records() if len(data) >= _NUMBA_MIN_SIZE else None
+    if walk is not None:
+        starts = walk(np.frombuffer(data, dtype=np.uint8))
+    else:
+        starts = []
+        pos = 0
+        while pos + 2 <= len(data):
+            (DCULENG,) = _DCULENG.unpack_from(data, pos)
+            if DCULENG == 0:
+                # nothing sensible left in the file
+                break
+            starts.append(pos)
+            if DCULENG < _MIN_DCULENG:
+                break
+            pos += DCULENG
+        starts = np.array(starts, dtype=np.int64)
+    if len(starts):
+        (DCULENG,) = _DCULENG.unpack_from(data, starts[-1])
+        if DCULENG < _MIN_DCULENG:
+            raise UsageError(f'Truncated DCOLLECT record at offset {starts[-1]}: {DCULENG} bytes long, '
+                             f'too short for the record header. Was it transferred in binary?')
+        if starts[-1] + DCULENG > len(data):
+            raise UsageError(f'Truncated DCOLLECT record at offset {starts[-1]}: {DCULENG} bytes long, '
+                             f'but only {len(data) - starts[-1]} bytes left. Was it transferred in binary?')
+    return starts
+
+def _record_types(buf, starts):
+    """Returns the recordtype (DCURCTYP, as EBCDIC halfword) of the records at offsets ``starts`` in ``buf``."""
+    return (buf[starts+4].astype(np.uint16) << 8) | buf[starts+5]
+
+def _split_records(buf, starts):
+    """Returns the offsets of the D- and V-records among the records at offsets ``starts`` in ``buf``."""
+    rectypes = _record_types(buf, starts)
+    return starts[rectypes == _RECTYPE_D], starts[rectypes == _RECTYPE_V]
+
+# Layout of the part of a D-record we parse (dcollect-offsets.json). Offsets are relative to the start of the
+# record (so including the DCULENG field) as documented in the DCOLLECT record structure.
+with importlib.resources.open_text("mfpandas", "dcollect-offsets.json") as file:
+    _offsets = json.load(file)
+
+def _record_dtype(rectype):
+    """Returns the structured dtype for the fields of ``rectype`` listed in dcollect-offsets.json."""
+    fields = _offsets[rectype]['fields']
+    return np.dtype({
+        'names':   [f['field-name'] for f in fields],
+        'formats': [f['type'] for f in fields],
+        'offsets': [f['offset'] for f in fields],
+        'itemsize': _offsets[rectype]['length'],
+    })
+
+_D_DTYPE = _record_dtype('D')
+_V_DTYPE = _record_dtype('V')
+
+# The flags of a D-record, in DataFrame column order, as (column, field, mask, value). A flag is on when the bits of
+# its mask equal its value, by default the mask itself. The record format takes two bits: F=10, V=01 and U=11.
+_D_FLAGS = tuple((f['field-name'], f['byte'], int(f['mask'], 16), int(f.get('value', f['mask']), 16))
+                 for f in _offsets['D']['flags'])
+
+# The bytes holding the flags, and per flag the byte (as index in there), mask and value, so all
+# flags of all records can be tested in one go.
+_D_FLAG_FIELDS = tuple(dict.fromkeys(f[1] for f in _D_FLAGS))
+_D_FLAG_NAMES = [f[0] for f in _D_FLAGS]
+_D_FLAG_INDEX = np.array([_D_FLAG_FIELDS.index(f[1]) for f in _D_FLAGS])
+_D_FLAG_MASKS = np.array([f[2] for f in _D_FLAGS], dtype=np.uint8)
+_D_FLAG_VALUES = np.array([f[3] for f in _D_FLAGS], dtype=np.uint8)
+
+# cp500 is a single byte codepage, so a 256 entry table maps EBCDIC bytes to unicode codepoints
+_CP500_CHARS = bytes(range(256)).decode('cp500')
+_CP500 = np.array([ord(c) for c in _CP500_CHARS], dtype=np.uint32)
+_CP500_SPACE = np.array([c.isspace() for c in _CP500_CHARS])
+
+def _ebcdic(raw, strip=True):
+    """
+    Decodes an array of fixed length EBCDIC (cp500) fields (dtype S<n>) into an unicode array (dtype U<n>),
+    translating all bytes in one go. With strip the result is the same as .decode('cp500').strip() per field.
+    """
+    width = raw.dtype.itemsize
+    raw = np.ascontiguousarray(raw).view(np.uint8).reshape(len(raw), width)
+    codes = _CP500[raw]
+    if strip:
+        # trailing whitespace becomes NUL, which numpy drops from the end of unicode strings
+        space = _CP500_SPACE[raw]
+        trailing = np.logical_and.accumulate(space[:, ::-1], axis=1)[:, ::-1]
+        codes[trailing] = 0
+    values = codes.view(f'U{width}')[:, 0]
+    if strip:
+        leading = space[:, 0] & ~trailing[:, 0]
+        if leading.any():
+            values[leading] = np.char.lstrip(values[leading])
+    return values
+
+def _julian_dates(raw):
+    """
+    Converts an array of packed yyyydddF dates into datetime64[ms] values (the finest unit parquet
+    can store without overflowing on far-off expiration dates, so the dtype survives save_parquet).
+    Dates that are not set (or invalid, see https://www.mxg.com/changes/chng0808.asp) become NaT.
+    """
+    raw = raw.astype(np.uint32)
+    # 7 decimal digits, the last nibble is the sign
+    digits = [(raw >> shift) & 0xF for shift in range(28, 0, -4)]
+    year = digits[0]*1000 + digits[1]*100 + digits[2]*10 + digits[3]
+    day = digits[4]*100 + digits[5]*10 + digits[6]
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    valid = np.logical_and.reduce([d <= 9 for d in digits]) & (year > 0) & (day > 0) & (day <= 365 + leap)
+    year = np.where(valid, year, 1970).astype(np.int64)
+    day = np.where(valid, day, 1).astype(np.int64)
+    dates = (year - 1970).astype('datetime64[Y]').astype('datetime64[D]') + (day - 1).astype('timedelta64[D]')
+    return np.where(valid, dates, np.datetime64('NaT')).astype('datetime64[ms]')
+
+# Low-cardinality D-record columns, stored as category
+_D_CATEGORIES = ('DCDVOLSR', 'DCDATCL', 'DCDSTGCL', 'DCDMGTCL', 'DCDSTGRP')
+
+def _gather(buf, starts, dtype):
+    """
+    Copies the records at offsets ``starts`` in ``buf`` into a structured array of ``dtype``.
+    Records shorter than dtype.itemsize (by their DCULENG) are padded with zeros, so they never pick up
+    bytes of the next record.
+    """
+    if len(starts) == 0:
+        return np.zeros(0, dtype=dtype)
+    lengths = (buf[starts].astype(np.int64) << 8) | buf[starts+1]
+    short = lengths < dtype.itemsize
+    if not short.any():
+        window = np.lib.stride_tricks.sliding_window_view(buf, dtype.itemsize)
+        return window[starts].view(dtype)[:, 0]
+    recs = np.zeros(len(starts), dtype=dtype)
+    raw = recs.view(np.uint8).reshape(len(starts), dtype.itemsize)
+    if not short.all():
+        window = np.lib.stride_tricks.sliding_window_view(buf, dtype.itemsize)
+        raw[~short] = window[starts[~short]]
+    for i in np.flatnonzero(short):
+        raw[i, :lengths[i]] = buf[starts[i]:starts[i]+lengths[i]]
+    return recs
+
+def _d_columns(buf, starts):
+    """
+    Decodes the D-records at offsets ``starts`` in ``buf`` (the entire DCOLLECT file as an uint8 array).
+    Returns the flags as one 2D bool array (columns in _D_FLAGS order) and a dict with the other columns.
+    Every D-record is copied into a structured array (see _D_DTYPE) so all fields
+    become NumPy columns without looping over the records in Python.
+    """
+    recs = _gather(buf, starts, _D_DTYPE)
+
+    flagbytes = np.stack([recs[field] for field in _D_FLAG_FIELDS], axis=1)
+    flags = (flagbytes[:, _D_FLAG_INDEX] & _D_FLAG_MASKS) == _D_FLAG_VALUES
+
+    cols = {}
+    cols['DCDDSNAM'] = _ebcdic(recs['DCDDSNAM'])
+
+    cols['DCDNMEXT'] = recs['DCDNMEXT'].astype(np.int16)
+    cols['DCDVOLSR'] = _ebcdic(recs['DCDVOLSR'], strip=False)
+    cols['DCDBKLNG'] = recs['DCDBKLNG'].astype(np.int32)
+    cols['DCDLRECL'] = recs['DCDLRECL'].astype(np.int32)
+
+    # 31 BIT SPACE VALUES IN KBs (1024). ONLY VALID WHEN THEIR FLAG IS ON.
+    cols['DCDALLSP'] = np.where(flags[:, _D_FLAG_NAMES.index('DCDALLFG')], recs['DCDALLSP'], 0).astype(np.int32)
+    cols['DCDUSESP'] = np.where(flags[:, _D_FLAG_NAMES.index('DCDUSEFG')], recs['DCDUSESP'], 0).astype(np.int32)
+    cols['DCDSCALL'] = np.where(flags[:, _D_FLAG_NAMES.index('DCDSECFG')], recs['DCDSCALL'], 0).astype(np.int32)
+    cols['DCDNMBLK'] = np.where(flags[:, _D_FLAG_NAMES.index('DCDNMBFG')], recs['DCDNMBLK'], 0).astype(np.int64)
+
+    # formats = yyyydddF
+    cols['DCDCREDT'] = _julian_dates(recs['DCDCREDT'])
+    cols['DCDEXPDT'] = _julian_dates(recs['DCDEXPDT'])
+    cols['DCDLSTRF'] = _julian_dates(recs['DCDLSTRF'])
+
+    for name, field in (('DCDATCL', 'DCDDATCL'), ('DCDSTGCL', 'DCDSTGCL'), ('DCDMGTCL', 'DCDMGTCL'), ('DCDSTGRP', 'DCDSTGRP')):
+        values = _ebcdic(recs[field])
+        cols[name] = np.where(values == '', '*NONE*', values)
+
+    return flags, cols
+
+def _d_batch(flags, cols):
+    """Merges the output of _d_columns into one dict of columns, in DataFrame column order."""
+    batch = {'DCDDSNAM': cols['DCDDSNAM']}
+    batch.update(zip(_D_FLAG_NAMES, flags.T))
+    batch.update((name, col) for name, col in cols.items() if name != 'DCDDSNAM')
+    return batch
+
+def _d_frame(flags, cols, dtype_backend=None):
+    """
+    Builds the D-record DataFrame from the output of _d_columns. The flags go in as one 2D bool array,
+    so pandas keeps them in a single block instead of one block per flag.
+    With dtype_backend 'pyarrow' the columns go into an Arrow table instead, giving ArrowDtype columns.
+    """
+    # only a handful of volumes and SMS classes for all those datasets, so store those as category
+    cols = dict(cols, **{name: pd.Categorical(cols[name]) for name in _D_CATEGORIES})
+    if dtype_backend == 'pyarrow':
+        return _d_table(_d_batch(flags, cols)).to_pandas(types_mapper=pd.ArrowDtype)
+    flags = pd.DataFrame(flags, columns=_D_FLAG_NAMES, copy=False)
+    rest = pd.DataFrame(cols, copy=False)
+    return pd.concat([rest.iloc[:, :1], flags, rest.iloc[:, 1:]], axis=1)
+
+def _d_table(batch):
+    """Converts a dict of D-record columns (see _d_batch) into a pyarrow Table, unset dates become nulls."""
+    return pa.table({name: pa.array(col, from_pandas=True) for name, col in batch.items()})
+
+def _v_columns(buf, starts):
+    """
+    Decodes the V-records at offsets ``starts`` in ``buf`` (the entire DCOLLECT file as an uint8 array).
+    Like the D-records, they're copied into a structured array (see _V_DTYPE) and decoded per column.
+    Returns a dict with the columns, in DataFrame column order.
+    """
+    recs = _gather(buf, starts, _V_DTYPE)
+
+    v = {}
+    v['DCVVOLSR'] = _ebcdic(recs['DCVVOLSR'])
+    v['DCVPERCT'] = recs['DCVPERCT'].astype(np.int64)
+
+    # with DCVCYLMG on these are in MB instead of KB
+    DCVCYLMG = (recs['DCVCYLMG'] & 0b10000000) != 0
+    for name in ('DCVFRESP', 'DCVALLOC', 'DCVVLCAP'):
+        values = recs[name].astype(np.int64)
+        v[name] = np.where(DCVCYLMG, values << 10, values)
+
+    for name in ('DCVFRAGI', 'DCVLGEXT', 'DCVFREXT', 'DCVFDSCB', 'DCVFVIRS'):
+        v[name] = recs[name].astype(np.int64)
+
+    v['DCVDVTYP'] = pd.Categorical(_ebcdic(recs['DCVDVTYP']))
+
+    # device number as integer, f'{n:04X}' gives the usual notation
+    v['DCVDVNUM'] = recs['DCVDVNUM'].astype(np.uint16)
+
+    v['DCVSGTCL'] = pd.Categorical(_ebcdic(recs['DCVSGTCL']))
+    v['DCVDPTYP'] = pd.Categorical(_ebcdic(recs['DCVDPTYP']))
+    return v
+
+def _d_columns_shard(path, starts):
+    """Worker for DCOLLECT.parse_t_parallel, maps the DCOLLECT file and decodes the D-records at ``starts``."""
+    buf = np.memmap(path, dtype=np.uint8, mode='r')
+    return _d_columns(buf, starts)
+
 class DCOLLECT:
 
     """
@@ -46,6 +346,8 @@ class DCOLLECT:
     Args:
         dcollect (str): The full path to your DCOLLECT file. Defaults
             to None.
+        dtype_backend (str): Use 'pyarrow' to get DataFrames with pyarrow backed
+            columns (needs pyarrow installed). Defaults to None (NumPy).
     """
     # Our states
     STATE_BAD         = -1
@@ -53,11 +355,7 @@ class DCOLLECT:
     STATE_PARSING     =  1
     STATE_READY       =  2
 
-    # Counters
-    records_seen = {}
-    records_parsed = {}
-
-    def __init__(self, dcollect=None):
+    def __init__(self, dcollect=None, dtype_backend=None):
         """
         Initialize the DCOLLECT class.
         Recordlayout from: https://www.ibm.com/docs/en/zos/3.1.0?topic=output-dcollect-record-structure
@@ -66,7 +364,10 @@ class DCOLLECT:
 
         :param dcollect: Full path to DCOLLECT file
         :type dcollect: str
+        :param dtype_backend: 'pyarrow' for pyarrow backed DataFrames, None for NumPy
+        :type dtype_backend: str
         :raise UsageError: If no dcollect file specified.
+        :raise UsageError: If dtype_backend is unknown, or 'pyarrow' without pyarrow installed.
 
         Example usage::
 
@@ -80,80 +381,20 @@ class DCOLLECT:
         if not dcollect:
             raise UsageError("No DCOLLECT file specified.")
         self._dcolfile = dcollect
+        if dtype_backend not in (None, 'pyarrow'):
+            raise UsageError(f"Unknown dtype_backend {dtype_backend}, use 'pyarrow' or None.")
+        if dtype_backend == 'pyarrow' and pa is None:
+            raise UsageError("dtype_backend 'pyarrow' needs pyarrow, pip install pyarrow.")
+        self._dtype_backend = dtype_backend
 
-        self._state = self.STATE_INIT 
-
-        self._DRECS = {
-            'DCDDSNAM': [],
-            'DCDRACFD': [],
-            'DCDSMSM': [],
-            'DCDTEMP': [], 
-            'DCDPDSE': [], 
-            'DCDGDS': [],  
-            'DCDREBLK': [],
-            'DCDCHIND': [],
-            'DCDCKDSI': [],
-            'DCDNOVVR': [],
-            'DCDINTCG': [],
-            'DCDINICF': [],
-            'DCDALLFG': [],
-            'DCDUSEFG': [],
-            'DCDSECFG': [],
-            'DCDNMBFG': [],
-            'DCDPDSEX': [],
-            'DCDSTRP': [],
-            'DCDDDMEX': [],
-            'DCDCPOIT': [],
-            'DCDGT64K': [],
-            'DCDCMPTV': [],
-            'DCDDSGIS': [],
-            'DCDDSGPS': [],
-            'DCDDSGDA': [],
-            'DCDDSGPO': [],
-            'DCDDSGU': [],
-            'DCDDSGGS': [],
-            'DCDDSGVS': [],
-            'DCDRECFF': [],
-            'DCDRECFV': [],
-            'DCDRECFU': [],
-            'DCDRECFT': [],
-            'DCDRECFB': [],
-            'DCDRECFS': [],
-            'DCDRECFA': [],
-            'DCDRECFC': [],
-            'DCDNMEXT': [],
-            'DCDVOLSR': [],
-            'DCDBKLNG': [],
-            'DCDLRECL': [],
-            'DCDALLSP': [],
-            'DCDUSESP': [],
-            'DCDSCALL': [],    
-            'DCDNMBLK': [],
-            'DCDCREDT': [],
-            'DCDEXPDT': [],
-            'DCDLSTRF': [],
-            'DCDATCL': [],
-            'DCDSTGCL': [],
-            'DCDMGTCL': [],
-            'DCDSTGRP': []
-            }
-        self._VRECS = {
-            'DCVVOLSR': [],
-            'DCVPERCT': [],
-            'DCVFRESP': [],
-            'DCVALLOC': [],
-            'DCVVLCAP': [],
-            'DCVFRAGI': [],
-            'DCVLGEXT': [],
-            'DCVFREXT': [],
-            'DCVFDSCB': [],
-            'DCVFVIRS': [],
-            'DCVDVTYP': [],
-            'DCVDVNUM': [],
-            'DCVSGTCL': [],
-            'DCVDPTYP': [],
-
-        }                   
+        self._state = self.STATE_INIT
+
+        # Counters, per recordtype
+        self.records_seen = {}
+        self.records_parsed = {}
+
+        # volser -> sorted dataset names, built on first use by datsets_on_volume
+        self._volume_index = None
 
     def parse_t(self):
         """
@@ -167,206 +408,168 @@ class DCOLLECT:
             >>> d.parse_t()        
 
         """
+        self._state = self.STATE_PARSING
+        try:
+            buf, dstarts, vstarts = self._scan()
+            self.drecs = self._parse_drecs(buf, dstarts)
+            self.vrecs = self._parse_vrecs(buf, vstarts)
+        except BaseException:
+            self._state = self.STATE_BAD
+            raise
+        self._parsed(dstarts, vstarts)
+
+    def parse_t_parallel(self, workers=None):
+        """
+        Function to parse the dcollect file, decoding the D-records in multiple processes.
+        Every worker maps the DCOLLECT file itself and decodes its own share of the D-records,
+        so this pays off for big DCOLLECT files on machines with a couple of cores.
+
+        :param workers: Number of worker processes, defaults to the number of CPUs
+        :type workers: int
+
+        Example usage::
+
+            >>> from mfpandas import DCOLLECT
+            >>> d = DCOLLECT(dcollect='/path/to/binary/dcollect/file') 
+            >>> d.parse_t_parallel()        
+
+        """
+        self._state = self.STATE_PARSING
+        try:
+            buf, dstarts, vstarts = self._scan()
+            shards = [shard for shard in np.array_split(dstarts, workers or os.cpu_count() or 1) if len(shard)]
+            if len(shards) > 1:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=len(shards)) as pool:
+                    parts = list(pool.map(_d_columns_shard, [self._dcolfile] * len(shards), shards))
+                flags = np.concatenate([part[0] for part in parts])
+                cols = {name: np.concatenate([part[1][name] for part in parts]) for name in parts[0][1]}
+                self.drecs = _d_frame(flags, cols, self._dtype_backend)
+            else:
+                self.drecs = self._parse_drecs(buf, dstarts)
+            self.vrecs = self._parse_vrecs(buf, vstarts)
+        except BaseException:
+            self._state = self.STATE_BAD
+            raise
+        self._parsed(dstarts, vstarts)
+
+    def iter_d_chunks(self, chunk=65536):
+        """
+        Generator that decodes the D-records in batches of ``chunk`` records, without building a DataFrame.
+        Every batch is a dict with the same columns as the .datasets DataFrame, as NumPy arrays.
+        The file is mapped instead of read, so memory use stays at about one batch.
+
+        :param chunk: Number of records per batch
+        :type chunk: int
+
+        Example usage::
+
+            >>> from mfpandas import DCOLLECT
+            >>> d = DCOLLECT(dcollect='/path/to/binary/dcollect/file') 
+            >>> for batch in d.iter_d_chunks():
+            ...     print(len(batch['DCDDSNAM']))
+
+        """
+        buf = self._map()
+        dstarts, _ = _split_records(buf, _scan_records(buf))
+        for i in range(0, len(dstarts), chunk):
+            yield _d_batch(*_d_columns(buf, dstarts[i:i+chunk]))
+
+    def iter_v_chunks(self, chunk=65536):
+        """
+        Generator that decodes the V-records in batches of ``chunk`` records, without building a DataFrame.
+        Every batch is a dict with the same columns as the .volumes DataFrame.
+
+        :param chunk: Number of records per batch
+        :type chunk: int
+
+        Example usage::
+
+            >>> from mfpandas import DCOLLECT
+            >>> d = DCOLLECT(dcollect='/path/to/binary/dcollect/file') 
+            >>> for batch in d.iter_v_chunks():
+            ...     print(len(batch['DCVVOLSR']))
+
+        """
+        buf = self._map()
+        _, vstarts = _split_records(buf, _scan_records(buf))
+        for i in range(0, len(vstarts), chunk):
+            yield _v_columns(buf, vstarts[i:i+chunk])
+
+    def _map(self):
+        """Maps the dcollect file into memory (read-only) as an uint8 array."""
+        if os.path.getsize(self._dcolfile) == 0:
+            # an empty file cannot be mapped
+            return np.zeros(0, dtype=np.uint8)
         with open(self._dcolfile, 'rb') as fid:
-            self._state = self.STATE_PARSING
-            while True:
-                try:
-                    DCULENG = int(fid.read(2).hex(),16)
-                except:
-                    # we must have hit the end of the file :)
-                    break
-                #print('Have a record of',DCULENG,'bytes')
-                restrec = fid.read(DCULENG-2)
-                DCURCTYP = restrec[2:4].decode('cp500').strip()
-                if DCURCTYP in self.records_seen:
-                    self.records_seen[DCURCTYP] += 1
-                else:
-                    self.records_seen[DCURCTYP] = 1
-                    self.records_parsed[DCURCTYP] = 0
-                if DCURCTYP == 'D':
-                    self._DRECS['DCDDSNAM'].append(restrec[22:66].decode('cp500').strip())
-                    DCDERROR = bin(restrec[66])
-                    DCDFLAG1 = int(bin(restrec[67]),2)
-                    self._DRECS['DCDRACFD'].append((DCDFLAG1 & 0b10000000) != 0)
-                    self._DRECS['DCDSMSM'].append((DCDFLAG1 & 0b01000000) != 0)
-                    self._DRECS['DCDTEMP'].append((DCDFLAG1 & 0b00100000) != 0)
-                    self._DRECS['DCDPDSE'].append((DCDFLAG1 & 0b00010000) != 0)
-                    self._DRECS['DCDGDS'].append((DCDFLAG1 & 0b00001000) != 0)
-                    self._DRECS['DCDREBLK'].append((DCDFLAG1 & 0b00000100) != 0)
-                    self._DRECS['DCDCHIND'].append((DCDFLAG1 & 0b00000010) != 0)
-                    self._DRECS['DCDCKDSI'].append((DCDFLAG1 & 0b00000001) != 0)
-
-                    DCDFLAG2 = int(bin(restrec[68]),2)
-                    self._DRECS['DCDNOVVR'].append((DCDFLAG2 & 0b10000000) != 0)
-                    self._DRECS['DCDINTCG'].append((DCDFLAG2 & 0b01000000) != 0)
-                    self._DRECS['DCDINICF'].append((DCDFLAG2 & 0b00100000) != 0)
-                    if (DCDFLAG2 & 0b00001000) != 0:
-                        # 31 BIT SPACE ALLOCATED TO DATA SET IN KBs (1024). ONLY VALID WHEN DCDALLFG = ON.
-                        self._DRECS['DCDALLSP'].append((int(restrec[86:90].hex(),16)))
-                    else:
-                        self._DRECS['DCDALLSP'].append(0)
-                    self._DRECS['DCDALLFG'].append((DCDFLAG2 & 0b00001000) != 0)
-                    if (DCDFLAG2 & 0b00000100) != 0:
-                        # 31 BIT SPACE USED BY DATA SET IN KBs (1024). ONLY VALID WHEN DCDUSEFG = ON.
-                        self._DRECS['DCDUSESP'].append((int(restrec[90:94].hex(),16)))
-                    else:
-                        self._DRECS['DCDUSESP'].append(0)
-                    self._DRECS['DCDUSEFG'].append((DCDFLAG2 & 0b00000100) != 0)
-                    if (DCDFLAG2 & 0b00000010) != 0:
-                        #31 BIT SECONDARY ALLOCATION IN KBs (1024). ONLY VALID WHEN DCDSECFG = ON.
-                        self._DRECS['DCDSCALL'].append((int(restrec[94:98].hex(),16)))
-                    else:
-                         self._DRECS['DCDSCALL'].append(0)
-                    self._DRECS['DCDSECFG'].append((DCDFLAG2 & 0b00000010) != 0)
-                    if (DCDFLAG2 & 0b00000001) != 0:
-                        #31 BIT NUMBER OF KILOBYTES (1024) THAT COULD BE ADDED TO THE USED SPACE IF THE BLOCK SIZE OR CI SIZE WERE OPTIMIZED. ONLY VALID WHEN DCDNMBFG = ON.
-                        self._DRECS['DCDNMBLK'].append((int(restrec[98:102].hex(),16)))
-                    else:
-                        self._DRECS['DCDNMBLK'].append(0)
-                    self._DRECS['DCDNMBFG'].append((DCDFLAG2 & 0b00000001) != 0)
-    
-                    DCDFLAG3 = int(bin(restrec[69]),2)
-                    self._DRECS['DCDPDSEX'].append((DCDFLAG3 & 0b10000000) != 0)
-                    self._DRECS['DCDSTRP'].append((DCDFLAG3 & 0b01000000) != 0)
-                    self._DRECS['DCDDDMEX'].append((DCDFLAG3 & 0b00100000) != 0)
-                    self._DRECS['DCDCPOIT'].append((DCDFLAG3 & 0b00010000) != 0)
-                    self._DRECS['DCDGT64K'].append((DCDFLAG3 & 0b00001000) != 0)
-                    self._DRECS['DCDCMPTV'].append((DCDFLAG3 & 0b00000100) != 0)
-         
-                    DCDDSOR0 = int(bin(restrec[72]),2)
-                    self._DRECS['DCDDSGIS'].append((DCDDSOR0 & 0b10000000) != 0)
-                    self._DRECS['DCDDSGPS'].append((DCDDSOR0 & 0b01000000) != 0)
-                    self._DRECS['DCDDSGDA'].append((DCDDSOR0 & 0b00100000) != 0)
-                    self._DRECS['DCDDSGPO'].append((DCDDSOR0 & 0b00000010) != 0)
-                    self._DRECS['DCDDSGU'].append((DCDDSOR0 & 0b00000001) != 0)
-
-                    DCDDSOR1 = int(bin(restrec[73]),2)
-                    self._DRECS['DCDDSGGS'].append((DCDDSOR1 & 0b10000000) != 0)
-                    self._DRECS['DCDDSGVS'].append((DCDDSOR1 & 0b00001000) != 0)
-
-                    DCDRECRD = int(bin(restrec[74]),2)
-                    self._DRECS['DCDRECFF'].append((DCDRECRD & 0b10000000) != 0)
-                    self._DRECS['DCDRECFV'].append((DCDRECRD & 0b01000000) != 0)
-                    self._DRECS['DCDRECFU'].append((DCDRECRD & 0b11000000) != 0)
-                    self._DRECS['DCDRECFT'].append((DCDRECRD & 0b00100000) != 0)
-                    self._DRECS['DCDRECFB'].append((DCDRECRD & 0b00010000) != 0)      
-                    self._DRECS['DCDRECFS'].append((DCDRECRD & 0b00001000) != 0) 
-                    self._DRECS['DCDRECFA'].append((DCDRECRD & 0b00000100) != 0) 
-                    self._DRECS['DCDRECFC'].append((DCDRECRD & 0b00000010) != 0)                                  
-
-                    self._DRECS['DCDNMEXT'].append(int(restrec[75]))
-                    self._DRECS['DCDVOLSR'].append(restrec[76:82].decode('cp500'))
-                    self._DRECS['DCDBKLNG'].append(int(restrec[82:84].hex(),16))
-                    self._DRECS['DCDLRECL'].append(int(restrec[84:86].hex(),16))
-
-                    # formats = yyyydddF
-                    createraw = restrec[102:106].hex()[0:7]
-                    crdte = datetime.datetime.strptime(createraw, '%Y%j').date()
-                    self._DRECS['DCDCREDT'].append(crdte)
-
-                    expraw = restrec[106:110].hex()[0:7]
-                    if expraw == '0000000':
-                        expdte = False
-                    elif expraw[4:] == '000':
-                        expdte = False 
-                    else:
-                        try:
-                            expdte =  datetime.datetime.strptime(expraw, '%Y%j').date()
-                        except:
-                            # https://www.mxg.com/changes/chng0808.asp
-                            expdte = False
-                    
-                    self._DRECS['DCDEXPDT'].append(expdte)
-
-                    lrraw = restrec[110:114].hex()[0:7]
-                    if lrraw == '0000000':
-                        lrdte = False
-                    else:
-                        lrdte = datetime.datetime.strptime(lrraw, '%Y%j').date()
-                    self._DRECS['DCDLSTRF'].append(lrdte)
-
-
-
-                    dc = restrec[132:162].decode('cp500').strip()
-                    sc = restrec[164:194].decode('cp500').strip()
-                    mc = restrec[196:226].decode('cp500').strip()
-                    sg = restrec[228:258].decode('cp500').strip()
-
-                    if dc != '':
-                        self._DRECS['DCDATCL'].append(dc)
-                    else:
-                        self._DRECS['DCDATCL'].append('*NONE*')
-                    
-                    if sc != '':
-                        self._DRECS['DCDSTGCL'].append(sc)
-                    else:
-                        self._DRECS['DCDSTGCL'].append('*NONE*')
-                    
-                    if mc != '':
-                        self._DRECS['DCDMGTCL'].append(mc)
-                    else:
-                        self._DRECS['DCDMGTCL'].append('*NONE*')
-
-                    if sg != '':
-                        self._DRECS['DCDSTGRP'].append(sg)
-                    else:
-                        self._DRECS['DCDSTGRP'].append('*NONE*')
-
-                    
-                    self.records_parsed['D'] += 1
-                elif DCURCTYP == 'V':
-                    self._VRECS['DCVVOLSR'].append(restrec[22:28].decode('cp500').strip())
-                    self._VRECS['DCVPERCT'].append(int(restrec[33:34].hex(),16))
-
-                    DCVCYLMG = int(bin(restrec[119]),2) & 0b10000000 == True
-                    fresp = int(restrec[34:38].hex(),16)
-                    alloc = int(restrec[38:42].hex(),16)
-                    vlcap = int(restrec[42:46].hex(),16)
-                    if DCVCYLMG:
-                        fresp *= 1024
-                        alloc *= 1024
-                        vlcap *= 1024
-                    self._VRECS['DCVFRESP'].append(fresp)
-                    self._VRECS['DCVALLOC'].append(alloc)
-                    self._VRECS['DCVVLCAP'].append(vlcap)
-
-                    self._VRECS['DCVFRAGI'].append(int(restrec[46:50].hex(),16))
-                    self._VRECS['DCVLGEXT'].append(int(restrec[50:54].hex(),16))
-                    self._VRECS['DCVFREXT'].append(int(restrec[54:58].hex(),16))
-                    self._VRECS['DCVFDSCB'].append(int(restrec[58:62].hex(),16))
-                    self._VRECS['DCVFVIRS'].append(int(restrec[62:66].hex(),16))
-
-                    self._VRECS['DCVDVTYP'].append(restrec[66:74].decode('cp500').strip())
-
-                    # maybe want 'int' value?
-                    self._VRECS['DCVDVNUM'].append(hex(int(restrec[74:76].hex(),16)))
-                    
-                    self._VRECS['DCVSGTCL'].append(restrec[80:110].decode('cp500').strip())
-                    self._VRECS['DCVDPTYP'].append(restrec[110:118].decode('cp500').strip())
-
-                    self.records_parsed['V'] += 1
-
-            self.drecs = pd.DataFrame.from_dict(self._DRECS)
-            del self._DRECS
-            self.vrecs = pd.DataFrame.from_dict(self._VRECS)
-            del self._VRECS
-            self._state = self.STATE_READY
+            mm = mmap.mmap(fid.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_WILLNEED'):
+            # we'll touch all of it (twice), so let the OS read ahead
+            mm.madvise(mmap.MADV_WILLNEED)
+        return np.frombuffer(mm, dtype=np.uint8)
+
+    def _scan(self):
+        """
+        Maps the dcollect file and finds all records in there, counting them per recordtype.
+        Returns the file (as uint8 array) and the offsets of the D- and V-records.
+        """
+        buf = self._map()
+
+        # first pass: find where all records are, second pass: decode them per recordtype
+        starts = _scan_records(buf)
+        rectypes = _record_types(buf, starts)
+        codes, first, counts = np.unique(rectypes, return_index=True, return_counts=True)
+        self.records_seen = {}
+        self.records_parsed = {}
+        for i in np.argsort(first):
+            DCURCTYP = int(codes[i]).to_bytes(2, 'big').decode('cp500').strip()
+            self.records_seen[DCURCTYP] = int(counts[i])
+            self.records_parsed[DCURCTYP] = 0
+
+        return buf, starts[rectypes == _RECTYPE_D], starts[rectypes == _RECTYPE_V]
+
+    def _parsed(self, dstarts, vstarts):
+        """Updates the counters after decoding the D- and V-records and flags we're ready."""
+        if len(dstarts):
+            self.records_parsed['D'] = len(dstarts)
+        if len(vstarts):
+            self.records_parsed['V'] = len(vstarts)
+        self._volume_index = None
+        self._state = self.STATE_READY
+
+    def _parse_vrecs(self, buf, starts):
+        """
+        Decodes the V-records at offsets ``starts`` in ``buf`` (the entire DCOLLECT file as an uint8 array).
+        """
+        v = _v_columns(buf, starts)
+        if self._dtype_backend == 'pyarrow':
+            return pa.table(v).to_pandas(types_mapper=pd.ArrowDtype)
+        return pd.DataFrame(v, copy=False)
+
+    def _parse_drecs(self, buf, starts):
+        """
+        Decodes all D-records in one go. ``buf`` is the entire DCOLLECT file as an uint8 array,
+        ``starts`` holds the offsets of the D-records in there.
+        """
+        return _d_frame(*_d_columns(buf, starts), self._dtype_backend)
 
     def parse(self):
         """
         Function to parse the dcollect file as a background thread.
         This is a non-blocking function to parse the dcollect data.
-        Status of background parsing can be queried via the .status attribute.
+        Status of background parsing can be queried via the .status attribute,
+        the .future attribute is a concurrent.futures.Future to wait for the parsing to finish.
 
         Example usage::
 
             >>> from mfpandas import DCOLLECT
             >>> d = DCOLLECT(dcollect='/path/to/binary/dcollect/file') 
             >>> d.parse()       
+            >>> d.future.result()
 
         """        
-        pt = threading.Thread(target=self.parse_t)
-        pt.start()
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.future = pool.submit(self.parse_t)
+        pool.shutdown(wait=False)
         return True
     
     def parse_fancycli(self):
@@ -397,22 +600,31 @@ class DCOLLECT:
         """            
         print(f'{datetime.datetime.now().strftime("%y-%m-%d %H:%M:%S")} - parsing {self._dcolfile}')
         self.parse()
-        while self._state < self.STATE_READY:
+        while True:
             print(f'{datetime.datetime.now().strftime("%y-%m-%d %H:%M:%S")} - {self.status["status"]}', end='\r', flush=True)
-            time.sleep(0.5)
+            done, _ = concurrent.futures.wait([self.future], timeout=0.5)
+            if done:
+                break
         print('')
-        print(f'{datetime.datetime.now().strftime("%y-%m-%d %H:%M:%S")} - Done.')
+        # raises whatever went wrong while parsing
+        self.future.result()
+        now = datetime.datetime.now().strftime("%y-%m-%d %H:%M:%S")
+        print(f'{now} - Done.')
         for t in self.records_parsed:
-            print(f'{datetime.datetime.now().strftime("%y-%m-%d %H:%M:%S")}   - {self.records_seen[t]} {t}-records seen, {self.records_parsed[t]} parsed')
+            print(f'{now}   - {self.records_seen[t]} {t}-records seen, {self.records_parsed[t]} parsed')
 
-    def _save_pickle(self, df='', dfname='', path='', prefix=''):     
+    def _save_pickle(self, df='', dfname='', path='', prefix='', compress=False):     
         # Sanity check
         if self._state != self.STATE_READY:
             raise UsageError('Not done parsing yet!')
         
-        df.to_pickle(f'{path}/{prefix}{dfname}.pickle')
+        # protocol 5 writes the NumPy buffers without extra copies
+        if compress:
+            df.to_pickle(f'{path}/{prefix}{dfname}.pickle.zst', compression={'method': 'zstd', 'level': 3}, protocol=pickle.HIGHEST_PROTOCOL)
+        else:
+            df.to_pickle(f'{path}/{prefix}{dfname}.pickle', protocol=pickle.HIGHEST_PROTOCOL)
 
-    def save_pickles(self, path=None, prefix=None):
+    def save_pickles(self, path=None, prefix=None, compress=False):
         """Saves the generated DataFrames into pickles so you can quickly
         use them again in another run.
 
@@ -420,7 +632,10 @@ class DCOLLECT:
         :type path: path
         :param prefix: Prefix for the pickle files (optional)
         :type prefix: str
+        :param compress: Write zstd compressed pickles ({prefix}DRECS.pickle.zst), needs zstandard installed
+        :type compress: bool
         :raises UsageError: If not done parsing yet
+        :raises UsageError: If compress is set but zstandard is not installed
         :raises UsageError: If path does not exist and cannot be created
         :raises UsageError: If the pickle file cannot be created
         :return: True is success, UsageError is failure
@@ -429,15 +644,64 @@ class DCOLLECT:
         """
         if self._state != self.STATE_READY:
             raise UsageError("Not done parsing yet!")
-        if not os.path.exists(path):
-            madedir = os.system(f'mkdir -p {path}')
-            if madedir != 0:
-                raise UsageError(f'{path} does not exist, and cannot be created') 
+        if compress:
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                raise UsageError("compress needs zstandard, pip install zstandard.")
+        try:
+            os.makedirs(path, exist_ok=True)
+        except OSError as e:
+            raise UsageError(f'{path} does not exist, and cannot be created') from e
         for frame,name in [(self.drecs,'DRECS'), (self.vrecs,'VRECS')]:
-            self._save_pickle(frame, dfname=name, path=path, prefix=prefix)
+            self._save_pickle(frame, dfname=name, path=path, prefix=prefix, compress=compress)
+        return True
+
+    def save_parquet(self, path=None, prefix='', chunk=100000):
+        """Saves the D- and V-records as parquet files ({prefix}DRECS.parquet and {prefix}VRECS.parquet).
+        The D-records are decoded and written ``chunk`` records at a time (a row group each) straight
+        from the DCOLLECT file, so this does not need a parse() first and never holds all of them in memory.
+
+        :param path: Path to where the parquet files will be saved
+        :type path: path
+        :param prefix: Prefix for the parquet files (optional)
+        :type prefix: str
+        :param chunk: Number of D-records per row group
+        :type chunk: int
+        :raises UsageError: If pyarrow is not installed
+        :return: True is success
+        :rtype: bool
+
+        """
+        if pa is None:
+            raise UsageError("save_parquet needs pyarrow, pip install pyarrow.")
+        import pyarrow.parquet as pq
+        try:
+            os.makedirs(path, exist_ok=True)
+        except OSError as e:
+            raise UsageError(f'{path} does not exist, and cannot be created') from e
+
+        buf = self._map()
+        dstarts, vstarts = _split_records(buf, _scan_records(buf))
+
+        # without D-records we still want a (empty) file with the right columns
+        tables = (_d_table(_d_batch(*_d_columns(buf, dstarts[i:i+chunk]))) for i in range(0, max(len(dstarts), 1), chunk))
+        first = next(tables)
+        dfile = f'{path}/{prefix}DRECS.parquet'
+        try:
+            with pq.ParquetWriter(dfile, first.schema) as writer:
+                writer.write_table(first)
+                for table in tables:
+                    writer.write_table(table)
+        except BaseException:
+            # don't leave a half written DRECS file behind
+            if os.path.exists(dfile):
+                os.remove(dfile)
+            raise
+
+        self._parse_vrecs(buf, vstarts).to_parquet(f'{path}/{prefix}VRECS.parquet', index=False)
         return True
 
-    
     @property
     def status(self):
         """
@@ -455,6 +719,8 @@ class DCOLLECT:
         """       
         if self._state == self.STATE_READY:
             return {'status': 'Ready', 'records_seen': self.records_seen, 'records_parsed': self.records_parsed}
+        elif self._state == self.STATE_BAD:
+            return {'status': 'Error', 'records_seen': self.records_seen, 'records_parsed': self.records_parsed}
         else:
             return {'status': "Still Parsing your input", 'records_seen': self.records_seen, 'records_parsed': self.records_parsed}
         
@@ -488,12 +754,16 @@ class DCOLLECT:
         :type volume: str
         :raise UsageError: If unknown volume.
         """        
-        volser_check = self.vrecs.loc[self.vrecs.DCVVOLSR==volser]
-        if len(volser_check) == 0:
+        if self._volume_index is None:
+            # group all datasets per volume once, so every next lookup is just a dict lookup
+            index = {vol: [] for vol in self.vrecs['DCVVOLSR']}
+            for vol, dsnames in self.drecs.groupby('DCDVOLSR', observed=True, sort=False)['DCDDSNAM']:
+                if vol in index:
+                    index[vol] = sorted(dsnames)
+            self._volume_index = index
+        if volser not in self._volume_index:
             raise UsageError(f"Volser {volser} not found")
-        datasets = list(self.drecs.loc[self.drecs.DCDVOLSR==volser]['DCDDSNAM'].values)
-        datasets.sort()
-        return datasets
+        return list(self._volume_index[volser])
     
     
    
@@ -20,6 +20,14 @@ import glob
 
 import warnings 
 
+# low-cardinality columns are stored as category dtype, this saves a lot of memory
+# and speeds up filtering/grouping on these columns.
+_categorySuffixes = ('_TYPE', '_CLAS', '_CLASS', '_CLASS_NAME', '_FLAG', '_UACC', '_ACCESS')
+_categoryDescs = ('Valid Values include "Yes" and "No"',)
+
+def _isCategory(field):
+    return field["field-name"].endswith(_categorySuffixes) or any(d in field["field-desc"] for d in _categoryDescs)
+
 class StoopidException(Exception):
     def __init__(self, message):
         self.message = message
@@ -200,7 +208,8 @@ class IRRDBU00:
     for offset in _offsets:
         rtype = _offsets[offset]['record-type']
         if rtype in _recordtype_info.keys():
-          _recordtype_info[rtype].update({"offsets": _offsets[offset]["offsets"]})
+          _recordtype_info[rtype].update({"offsets": _offsets[offset]["offsets"],
+                                          "categories": [f["field-name"] for f in _offsets[offset]["offsets"] if _isCategory(f)]})
     try:
         del file, rtype, rinfo, offset, _offsets  # don't need these as class attributes
     except NameError:
@@ -258,6 +267,7 @@ class IRRDBU00:
                       "parsed": 0
                     }
 
+            self._categorize()
             self._state = self.STATE_READY
             self._stoptime = datetime.now()
 
@@ -396,6 +406,7 @@ class IRRDBU00:
         # create the interal attribs according to recordtype_info dict
         for (rtype,rinfo) in IRRDBU00._recordtype_info.items():
                 setattr(self, rinfo['df'], pd.DataFrame.from_dict(self._parsed[rtype]))
+        self._categorize()
 
 
 
@@ -408,6 +419,16 @@ class IRRDBU00:
         del self._parsed
         return True
 
+    def _categorize(self):
+        ''' Stores the low-cardinality columns (see _isCategory) of all internal DataFrames as category dtype.
+        Done once, right after parsing or loading pickles, so the public DataFrames always have the same dtypes.
+        '''
+        for rinfo in IRRDBU00._recordtype_info.values():
+            df = getattr(self, rinfo['df'])
+            for c in rinfo.get('categories', ()):
+                if c in df.columns:
+                    df[c] = df[c].astype('category')
+
     def parsed(self, rname):
         rtype = IRRDBU00._recordname_type[rname]
         return self._records[rtype]['parsed'] if rtype in self._records else 0
@@ -437,10 +458,10 @@ class IRRDBU00:
         if self._state != self.STATE_READY:
             raise StoopidException('Not done parsing yet! (PEBKAM/ID-10T error)')
         # Is Path there ?
-        if not os.path.exists(path):
-            madedir = os.system(f'mkdir -p {path}')
-            if madedir != 0:
-                raise StoopidException(f'{path} does not exist, and cannot create')
+        try:
+            os.makedirs(path, exist_ok=True)
+        except OSError as e:
+            raise StoopidException(f'{path} does not exist, and cannot create') from e
         # Let's save the pickles
         for (rtype,rinfo) in IRRDBU00._recordtype_info.items():
             if rtype in self._records and self._records[rtype]['parsed']>0:
@@ -505,25 +526,25 @@ class IRRDBU00:
     def specials(self):
         """Returns a ``USBD``-dataframe with all users that have the special attribute
         """
-        return self._users[self._users['USBD_SPECIAL'].to_numpy() == 'YES']
+        return self._users[self._users['USBD_SPECIAL'] == 'YES']
 
     @property
     def operations(self):
         """Returns a ``USBD``-dataframe with all users that have the operations attribute
         """        
-        return self._users[self._users['USBD_OPER'].to_numpy() == 'YES']
+        return self._users[self._users['USBD_OPER'] == 'YES']
 
     @property
     def auditors(self):
         """Returns a ``USBD``-dataframe with all users that have the auditor attribute
         """        
-        return self._users[self._users['USBD_AUDITOR'].to_numpy() == 'YES']
+        return self._users[self._users['USBD_AUDITOR'] == 'YES']
 
     @property
     def revoked(self):
         """Returns a ``USBD``-dataframe with all users that are revoked
         """
-        return self._users[self._users['USBD_REVOKE'].to_numpy() == 'YES']
+        return self._users[self._users['USBD_REVOKE'] == 'YES']
 
     def user(self, userid=None):
         """Returns a ``USBD``-dataframe with for the selected userid (empty if non-existing user)
@@ -560,25 +581,25 @@ class IRRDBU00:
     def uacc_read_datasets(self):
         """Returns a ``DSBD``-dataframe of all datasets that have UACC=READ (bad!)
         """
-        return self._datasets[self._datasets['DSBD_UACC'].to_numpy()=="READ"]
+        return self._datasets[self._datasets['DSBD_UACC'] == "READ"]
     
     @property
     def uacc_update_datasets(self):
         """Returns a ``DSBD``-dataframe of all datasets that have UACC=UPDATE (really bad!)
         """        
-        return self._datasets[self._datasets['DSBD_UACC'].to_numpy()=="UPDATE"]
+        return self._datasets[self._datasets['DSBD_UACC'] == "UPDATE"]
     
     @property   
     def uacc_control_datasets(self):
         """Returns a ``DSBD``-dataframe of all datasets that have UACC=CONTROL (really bad!)
         """            
-        return self._datasets[self._datasets['DSBD_UACC'].to_numpy()=="CONTROL"]
+        return self._datasets[self._datasets['DSBD_UACC'] == "CONTROL"]
     
     @property
     def uacc_alter_datasets(self):
         """Returns a ``DSBD``-dataframe of all datasets that have UACC=ALTER (really bad!)
         """            
-        return self._datasets[self._datasets['DSBD_UACC'].to_numpy()=="ALTER"]
+        return self._datasets[self._datasets['DSBD_UACC'] == "ALTER"]
 
     @property
     def orphans(self):
@@ -662,11 +683,12 @@ class IRRDBU00:
 
         ss = datetime.now()
 
-        classes = self.generalAccess.groupby(['GRACC_CLASS_NAME'])
+        classes = self.generalAccess.groupby('GRACC_CLASS_NAME', observed=True)
         for c in classes.groups:
             s = datetime.now()
-            authIDsInClass = list(self.generalAccess.loc[self.generalAccess.GRACC_CLASS_NAME==c]['GRACC_AUTH_ID'].unique())
-            profilesInClass = list(self.generalAccess.loc[self.generalAccess.GRACC_CLASS_NAME==c]['GRACC_NAME'].unique())
+            inClass = classes.get_group(c)
+            authIDsInClass = list(inClass['GRACC_AUTH_ID'].unique())
+            profilesInClass = list(inClass['GRACC_NAME'].unique())
             longestProfile = 0
             for p in profilesInClass:
                 if len(p) > longestProfile:
@@ -675,12 +697,11 @@ class IRRDBU00:
             newdata['Profiles'] = []
             for id in authIDsInClass:
                 newdata[id] = [None] * len(profilesInClass)
-            classdata = classes.get_group(c)
-            profiles = classdata.groupby(['GRACC_NAME'])
+            profiles = inClass.groupby('GRACC_NAME')
             for i,p in enumerate(profiles.groups):
                 profiledata = profiles.get_group(p)
                 newdata['Profiles'].append(p)
-                users = profiledata.groupby(['GRACC_AUTH_ID'])
+                users = profiledata.groupby('GRACC_AUTH_ID')
                 for u in users.groups:
                     useraccess = users.get_group(u)['GRACC_ACCESS'].values[0]
                     newdata[u][i] = accessLevels[useraccess]
@@ -715,11 +736,11 @@ class IRRDBU00:
             newdata['Profiles'] = []
             for id in authIDsInClass:
                     newdata[id] = [None] * len(profilesInClass)
-            profiles = self.datasetAccess.groupby(['DSACC_NAME'])
+            profiles = self.datasetAccess.groupby('DSACC_NAME')
             for i,p in enumerate(profiles.groups):
                 profiledata = profiles.get_group(p)
                 newdata['Profiles'].append(p)
-                users = profiledata.groupby(['DSACC_AUTH_ID'])
+                users = profiledata.groupby('DSACC_AUTH_ID')
                 for u in users.groups:
                     useraccess = users.get_group(u)['DSACC_ACCESS'].values[0]
                     newdata[u][i] = accessLevels[useraccess]
@@ -1982,16 +2003,16 @@ class IRRDBU00:
         """Returns a DataFrame for the data set csdata record
         More information: https://www.ibm.com/docs/en/SSLTBW_3.1.0/com.ibm.zos.v3r1.icha300/dsr.htm
 
-        ================= =======================================================================================================================
+        ================= ========================================================================================================================
         Column            Description
-        ================= =======================================================================================================================
+        ================= ========================================================================================================================
         DSCSD_RECORD_TYPE Record type of the Data Set CSDATA custom fields record (0431).
         DSCSD_NAME        Data set name as taken from the profile name.
         DSCSD_VOL         Volume upon which this data set resides. Blank if the profile is generic, and \*MODEL if the profile is a model profile.
         DSCSD_TYPE        Data type for the custom field. Valid values are CHAR, FLAG, HEX, NUM.
         DSCSD_KEY         Custom field keyword; maximum length = 8.
         DSCSD_VALUE       Custom field value.
-        ================= =======================================================================================================================
+        ================= ========================================================================================================================
 
         """
         return self._datasetCSDATA
@@ -2896,4 +2917,3 @@ class IRRDBU00:
 
         """
         return self._generalCERTname
-